@@ -2,23 +2,52 @@
 from __future__ import annotations
 
 import asyncio
+from collections import namedtuple
+from itertools import chain
 import logging
 import typing as t
 
+from pymodbus.pdu import ModbusExceptions
+
 from . import register_names as rn, register_values as rv
-from .exceptions import HuaweiSolarException, InvalidCredentials, PermissionDenied, ReadException
+from .exceptions import (
+    EncodeError,
+    HuaweiSolarException,
+    InvalidCredentials,
+    PermissionDenied,
+    ReadException,
+    WriteException,
+)
 from .files import (
     OptimizerRealTimeData,
     OptimizerRealTimeDataFile,
     OptimizerSystemInformation,
     OptimizerSystemInformationDataFile,
 )
-from .huawei_solar import DEFAULT_BAUDRATE, DEFAULT_SLAVE, DEFAULT_TCP_PORT, AsyncHuaweiSolar, Result
+from .huawei_solar import (
+    DEFAULT_BAUDRATE,
+    DEFAULT_SLAVE,
+    DEFAULT_TCP_PORT,
+    AsyncHuaweiSolar,
+    Result,
+    split_into_runs,
+)
+from .registers import REGISTERS
+from .utils import run_concurrently
 
 _LOGGER = logging.getLogger(__name__)
 
+# Default interval in seconds between heartbeats while logged in. A longer interval means less traffic
+# competing with the update-calls, but the inverter ends the session if it doesn't receive a heartbeat in time.
 HEARTBEAT_INTERVAL = 15
 
+# Time in seconds to wait for more writes to arrive when several writes are queued at the same time
+WRITE_BATCH_LINGER_TIME = 0.005
+
+# The registers to read on each update-call: `runs` are the groups of registers that are each read in one request
+# by `read_runs`, `names` are the register names of all runs flattened, in the order in which they are read
+RegisterPlan = namedtuple("RegisterPlan", "names runs")
+
 
 class HuaweiSolarBridge:
     """The HuaweiSolarBridge exposes a higher-level interface than AsyncHuaweiSolar,
@@ -30,12 +59,14 @@ class HuaweiSolarBridge:
         update_lock: asyncio.Lock,
         primary: bool,
         slave_id: t.Optional[int] = None,
+        heartbeat_interval: float = HEARTBEAT_INTERVAL,
     ):
         self.client = client
         self.update_lock = update_lock
 
         self._primary = primary
         self.slave_id = slave_id or 0
+        self.heartbeat_interval = heartbeat_interval
 
         self.model_name: t.Optional[str] = None
         self.serial_number: t.Optional[str] = None
@@ -50,10 +81,12 @@ class HuaweiSolarBridge:
         self.power_meter_online = False
         self.power_meter_type: t.Optional[rv.MeterType] = None
 
-        self._pv_registers = None
-
         self.__heartbeat_enabled = False
         self.__heartbeat_task: t.Optional[asyncio.Task] = None
+        self.__heartbeat_stopped = asyncio.Event()
+
+        self.__write_queue: asyncio.Queue[tuple[str, t.Any, asyncio.Future]] = asyncio.Queue()
+        self.__writer_task: t.Optional[asyncio.Task] = None
 
         self.__username: t.Optional[str] = None
         self.__password: t.Optional[str] = None
@@ -61,11 +94,17 @@ class HuaweiSolarBridge:
         self.previous_update_result: t.Optional[t.Dict[str, Result]] = None
 
     @classmethod
-    async def create(cls, host: str, port: int = DEFAULT_TCP_PORT, slave_id: int = DEFAULT_SLAVE):
+    async def create(
+        cls,
+        host: str,
+        port: int = DEFAULT_TCP_PORT,
+        slave_id: int = DEFAULT_SLAVE,
+        heartbeat_interval: float = HEARTBEAT_INTERVAL,
+    ):
         """Creates a HuaweiSolarBridge instance for the inverter hosting the modbus interface."""
         client = await AsyncHuaweiSolar.create(host, port, slave_id)
         update_lock = asyncio.Lock()
-        bridge = cls(client, update_lock, primary=True)
+        bridge = cls(client, update_lock, primary=True, heartbeat_interval=heartbeat_interval)
         await HuaweiSolarBridge.__populate_fields(bridge)
 
         return bridge
@@ -76,11 +115,12 @@ class HuaweiSolarBridge:
         port: str,
         baudrate: int = DEFAULT_BAUDRATE,
         slave_id: int = DEFAULT_SLAVE,
+        heartbeat_interval: float = HEARTBEAT_INTERVAL,
     ):
         """Creates a HuaweiSolarBridge instance for the inverter hosting the modbus interface."""
         client = await AsyncHuaweiSolar.create_rtu(port, baudrate, slave_id)
         update_lock = asyncio.Lock()
-        bridge = cls(client, update_lock, primary=True)
+        bridge = cls(client, update_lock, primary=True, heartbeat_interval=heartbeat_interval)
         await HuaweiSolarBridge.__populate_fields(bridge)
 
         return bridge
@@ -97,6 +137,7 @@ class HuaweiSolarBridge:
             primary_bridge.update_lock,
             primary=False,
             slave_id=slave_id,
+            heartbeat_interval=primary_bridge.heartbeat_interval,
         )
         await HuaweiSolarBridge.__populate_fields(bridge)
         return bridge
@@ -115,80 +156,106 @@ class HuaweiSolarBridge:
         bridge.serial_number = serial_number_result.value
         bridge.firmware_version = pn_result.value
 
-        bridge.pv_string_count = (await bridge.client.get(rn.NB_PV_STRINGS, bridge.slave_id)).value
-        bridge._compute_pv_registers()  # pylint: disable=protected-access
+        # These probes are independent of each other, so they are scheduled together instead of
+        # waiting for each one to finish before starting the next.
+        # Some inverters throw an IllegalAddress exception when accessing the optional registers,
+        # in which case get_multiple_best_effort returns None for them.
+        (
+            pv_string_count_result,
+            (nb_optimizers_result,),
+            (battery_1_type_result,),
+            (battery_2_type_result,),
+            (meter_status_result, meter_type_result),
+        ) = await run_concurrently(
+            bridge.client.get(rn.NB_PV_STRINGS, bridge.slave_id),
+            bridge.client.get_multiple_best_effort([rn.NB_OPTIMIZERS], bridge.slave_id),
+            bridge.client.get_multiple_best_effort([rn.STORAGE_UNIT_1_PRODUCT_MODEL], bridge.slave_id),
+            bridge.client.get_multiple_best_effort([rn.STORAGE_UNIT_2_PRODUCT_MODEL], bridge.slave_id),
+            # METER_TYPE can contain garbage when no power meter is present, which is handled by the best-effort read
+            bridge.client.get_multiple_best_effort([rn.METER_STATUS, rn.METER_TYPE], bridge.slave_id),
+        )
+
+        bridge.pv_string_count = pv_string_count_result.value
+        assert 1 <= bridge.pv_string_count <= 24
 
-        try:
-            bridge.has_optimizers = (await bridge.client.get(rn.NB_OPTIMIZERS, bridge.slave_id)).value
-        except ReadException:  # some inverters throw an IllegalAddress exception when accessing this address
-            pass
+        if nb_optimizers_result is not None:
+            bridge.has_optimizers = nb_optimizers_result.value
+        if battery_1_type_result is not None:
+            bridge.battery_1_type = battery_1_type_result.value
+        if battery_2_type_result is not None:
+            bridge.battery_2_type = battery_2_type_result.value
 
-        try:
-            bridge.battery_1_type = (await bridge.client.get(rn.STORAGE_UNIT_1_PRODUCT_MODEL, bridge.slave_id)).value
-        except ReadException:
-            pass
-        try:
-            bridge.battery_2_type = (await bridge.client.get(rn.STORAGE_UNIT_2_PRODUCT_MODEL, bridge.slave_id)).value
-        except ReadException:
-            pass
+        no_battery = rv.StorageProductModel.NONE
 
+        # cold path: only compare the battery types when the warning would actually be emitted
         if (
-            bridge.battery_1_type != rv.StorageProductModel.NONE
-            and bridge.battery_2_type != rv.StorageProductModel.NONE
+            _LOGGER.isEnabledFor(logging.WARNING)
+            and bridge.battery_1_type != no_battery
+            and bridge.battery_2_type != no_battery
             and bridge.battery_1_type != bridge.battery_2_type
         ):
             _LOGGER.warning("Detected two batteries of a different type. This can lead to unexpected behavior")
 
-        if bridge.battery_type != rv.StorageProductModel.NONE:
-            try:
-                await bridge.client.get(rn.STORAGE_CAPACITY_CONTROL_MODE, bridge.slave_id)
-                bridge.supports_capacity_control = True
-            except ReadException:
-                pass
-
-        try:
-            bridge.power_meter_online = (
-                await bridge.client.get(rn.METER_STATUS, bridge.slave_id)
-            ).value == rv.MeterStatus.NORMAL
-        except ReadException:
-            pass
+        if bridge.battery_type != no_battery:
+            (capacity_control_mode_result,) = await bridge.client.get_multiple_best_effort(
+                [rn.STORAGE_CAPACITY_CONTROL_MODE], bridge.slave_id
+            )
+            bridge.supports_capacity_control = capacity_control_mode_result is not None
 
         # Caveat: if the inverter is in offline mode, and the power meter is thus offline,
         # we will incorrectly detect that no power meter is present.
-        if bridge.power_meter_online:
-            bridge.power_meter_type = (await bridge.client.get(rn.METER_TYPE, bridge.slave_id)).value
+        bridge.power_meter_online = (
+            meter_status_result is not None and meter_status_result.value == rv.MeterStatus.NORMAL
+        )
 
-    async def _get_multiple_to_dict(self, names: list[str]) -> dict[str, Result]:
-        return dict(zip(names, await self.client.get_multiple(names, self.slave_id)))
+        if bridge.power_meter_online:
+            if meter_type_result is None:
+                _LOGGER.warning("Could not determine the type of the power meter, its registers will not be read")
+            else:
+                bridge.power_meter_type = meter_type_result.value
 
     async def update(self) -> dict[str, Result]:
         """Receive an update for all (interesting) available registers"""
+        result: dict[str, Result] = {}
+        await self.update_into(result)
+        return result
 
-        # Only update one slave at a time
-        async with self.update_lock:
-            result = await self._get_multiple_to_dict(INVERTER_REGISTERS)
+    async def update_into(self, result: dict[str, Result]):
+        """Receive an update for all (interesting) available registers into an existing dict.
+
+        This allows to reuse the same dict for every update-call. Registers that are not read
+        during this update-call keep their previous value in the dict.
+        """
 
-            # State and Alarm registers can be combined with PV registers due to close proximity
-            result.update(await self._get_multiple_to_dict(STATE_AND_ALARM_REGISTERS + self._pv_registers))
+        # the previous result might be the same dict, so remember the device status before overwriting it
+        previous_result = self.previous_update_result
+        previous_device_status = previous_result[rn.DEVICE_STATUS].value if previous_result else None
 
-            if self.has_optimizers:
-                result.update(await self._get_multiple_to_dict(OPTIMIZER_REGISTERS))
+        client = self.client
+        slave_id = self.slave_id
+
+        # Only update one slave at a time
+        async with self.update_lock:
+            plan = self._get_update_register_plan()
+            for name, value in zip(plan.names, await client.read_runs(plan.runs, slave_id)):
+                result[name] = value
 
             if self.power_meter_type is not None:
                 # If the 'device status' has changed, force a recheck of the power meter online status
                 # cfr. https://gitlab.com/Emilv2/huawei-solar/-/merge_requests/9#note_1281471842
-                if self.previous_update_result:
-                    if result[rn.DEVICE_STATUS].value != self.previous_update_result[rn.DEVICE_STATUS].value:
+                if previous_result:
+                    if result[rn.DEVICE_STATUS].value != previous_device_status:
                         self.power_meter_online = False
 
                 if not self.power_meter_online:
-                    power_meter_online_register = await self.client.get(rn.METER_STATUS, self.slave_id)
+                    power_meter_online_register = await client.get(rn.METER_STATUS, slave_id)
                     result[rn.METER_STATUS] = power_meter_online_register
                     self.power_meter_online = power_meter_online_register.value
 
                 if self.power_meter_online:
                     try:
-                        result.update(await self._get_multiple_to_dict(POWER_METER_REGISTERS))
+                        power_meter_results = await client.get_multiple(POWER_METER_REGISTERS, slave_id)
+                        result.update(zip(POWER_METER_REGISTERS, power_meter_results))
                     except HuaweiSolarException as exc:
                         _LOGGER.info(
                             "Fetching power meter registers failed. "
@@ -198,27 +265,27 @@ class HuaweiSolarBridge:
                         )
                         self.power_meter_online = False
 
-            if self.battery_type != rv.StorageProductModel.NONE:
-                result.update(await self._get_multiple_to_dict(ENERGY_STORAGE_REGISTERS))
-
         self.previous_update_result = result
-        return result
 
     async def update_configuration_registers(self):
         """Receive an update for all configurable registers"""
 
-        result = {}
+        runs: list[t.Sequence[str]] = []
+        if self.battery_type != rv.StorageProductModel.NONE:
+            runs.extend(
+                [
+                    ENERGY_STORAGE_CONFIGURATION_PARAMETERS_1,
+                    ENERGY_STORAGE_CONFIGURATION_PARAMETERS_2,
+                    ENERGY_STORAGE_CONFIGURATION_PARAMETERS_3,
+                    # We have no way of knowing if a backup box is installed, so always fetch these registers
+                    BACKUP_POWER_REGISTERS,
+                ]
+            )
+        if self.supports_capacity_control:
+            runs.append(CAPACITY_CONTROL_REGISTERS)
+
         async with self.update_lock:
-            if self.battery_type != rv.StorageProductModel.NONE:
-                result.update(await self._get_multiple_to_dict(ENERGY_STORAGE_CONFIGURATION_PARAMETERS_1))
-                result.update(await self._get_multiple_to_dict(ENERGY_STORAGE_CONFIGURATION_PARAMETERS_2))
-                result.update(await self._get_multiple_to_dict(ENERGY_STORAGE_CONFIGURATION_PARAMETERS_3))
-
-                # We have no way of knowing if a backup box is installed, so always fetch these registers
-                result.update(await self._get_multiple_to_dict(BACKUP_POWER_REGISTERS))
-            if self.supports_capacity_control:
-                result.update(await self._get_multiple_to_dict(CAPACITY_CONTROL_REGISTERS))
-        return result
+            return dict(zip(chain.from_iterable(runs), await self.client.read_runs(runs, self.slave_id)))
 
     async def _read_file(self, file_type, customized_data=None) -> bytes:
         """
@@ -235,7 +302,7 @@ class HuaweiSolarBridge:
             return await self.client.get_file(file_type, customized_data, self.slave_id)
         except PermissionDenied as err:
             if self.__username:
-                logged_in = await self.login(self.__username, self.__password)
+                logged_in = await self.__login(self.__username, self.__password)
 
                 if not logged_in:
                     _LOGGER.error("Could not login to read file %x .", file_type)
@@ -279,25 +346,22 @@ class HuaweiSolarBridge:
 
         return {opt.optimizer_address: opt for opt in system_information_data.optimizers}
 
-    def _compute_pv_registers(self):
-        """Get the registers for the PV strings which were detected from the inverter"""
-        assert 1 <= self.pv_string_count <= 24
+    def _get_update_register_plan(self) -> RegisterPlan:
+        """Get the runs of registers that are read on each update-call, based on the detected capabilities"""
+        key = (self.pv_string_count, bool(self.has_optimizers), self.battery_type != rv.StorageProductModel.NONE)
 
-        self._pv_registers = []
-        for idx in range(1, self.pv_string_count + 1):
-            self._pv_registers.extend(
-                [
-                    getattr(rn, f"PV_{idx:02}_VOLTAGE"),
-                    getattr(rn, f"PV_{idx:02}_CURRENT"),
-                ]
-            )
+        plan = _PRECOMPUTED_PLANS.get(key)
+        if plan is None:
+            plan = _PRECOMPUTED_PLANS[key] = _build_plan(*key)
+        return plan
 
     async def stop(self):
         """Stop the bridge."""
-        self.__heartbeat_enabled = False
+        if self.__writer_task is not None:
+            # let the queued writes finish while still logged in, otherwise they would log in again
+            await asyncio.wait([self.__writer_task])
 
-        if self.__heartbeat_task is not None:
-            self.__heartbeat_task.cancel()
+        await self.__stop_heartbeat()
 
         if self._primary:
             return await self.client.stop()
@@ -325,53 +389,152 @@ class HuaweiSolarBridge:
 
     async def login(self, username: str, password: str) -> bool:
         """Performs the login-sequence with the provided username/password."""
+        if self.__heartbeat_enabled and username == self.__username and password == self.__password:
+            # we are still logged in with these credentials
+            return True
+
+        return await self.__login(username, password)
+
+    async def __login(self, username: str, password: str) -> bool:
+        """Performs the login-sequence, even if the session still seems to be active."""
         if not await self.client.login(username, password, self.slave_id):
             raise InvalidCredentials()
 
         # save the correct login credentials
         self.__username = username
         self.__password = password
+
+        # the heartbeat of a previous session might still be running
+        await self.__stop_heartbeat()
         self.start_heartbeat()
 
         return True
 
+    async def __stop_heartbeat(self):
+        self.__heartbeat_enabled = False
+        self.__heartbeat_stopped.set()
+
+        if self.__heartbeat_task is not None:
+            # wakes up immediately, unless a heartbeat is being sent right now
+            await asyncio.wait([self.__heartbeat_task])
+
     def start_heartbeat(self):
         """Start the heartbeat thread to stay logged in."""
         if self.__heartbeat_task is not None and not self.__heartbeat_task.done():
             raise HuaweiSolarException("Cannot start heartbeat as it's still running!")
 
         async def heartbeat():
-            while self.__heartbeat_enabled:
+            # the stop event is checked instead of __heartbeat_enabled, as a heartbeat that is in flight
+            # while stopping must not resume the loop
+            while not self.__heartbeat_stopped.is_set():
                 try:
-                    self.__heartbeat_enabled = await self.client.heartbeat(self.slave_id)
-                    await asyncio.sleep(HEARTBEAT_INTERVAL)
+                    if not await self.client.heartbeat(self.slave_id):
+                        self.__heartbeat_enabled = False
+                        return
+                    await asyncio.wait_for(self.__heartbeat_stopped.wait(), self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    pass  # time for the next heartbeat
                 except HuaweiSolarException as err:
                     _LOGGER.warning("Heartbeat stopped because of, %s", err)
                     self.__heartbeat_enabled = False
+                    return
 
         self.__heartbeat_enabled = True
+        self.__heartbeat_stopped.clear()
         self.__heartbeat_task = asyncio.create_task(heartbeat())
 
     async def set(self, name: str, value):
-        """Sets a register to a certain value."""
+        """Sets a register to a certain value.
+
+        Writes that are issued at the same time are queued and, when they target registers that directly
+        follow each other, combined into a single request.
+        """
+        if name not in REGISTERS:
+            raise ValueError("Invalid Register Name")
+
+        future = asyncio.get_running_loop().create_future()
+        self.__write_queue.put_nowait((name, value, future))
+
+        if self.__writer_task is None or self.__writer_task.done():
+            self.__writer_task = asyncio.create_task(self.__process_write_queue())
+            self.__writer_task.add_done_callback(self.__fail_queued_writes)
+
+        return await future
+
+    async def __process_write_queue(self):
+        """Performs the queued writes, combining writes to consecutive registers."""
+        batch: list[tuple[str, t.Any, asyncio.Future]] = []
+        try:
+            while not self.__write_queue.empty():
+                # give other writes that are issued at the same time the chance to join this batch
+                await asyncio.sleep(WRITE_BATCH_LINGER_TIME if self.__write_queue.qsize() > 1 else 0)
+
+                batch = []
+                while not self.__write_queue.empty():
+                    write = self.__write_queue.get_nowait()
+                    if not write[2].done():  # skip the writes of which the caller was cancelled
+                        batch.append(write)
+
+                for run in _split_into_write_runs(batch):
+                    names = [name for name, _, _ in run]
+                    values = [value for _, value, _ in run]
+
+                    try:
+                        result = await self.__set_multiple(names, values)
+                    except Exception as err:  # pylint: disable=broad-except
+                        if len(run) == 1 or not _is_register_write_error(err):
+                            # errors that are not caused by one of the registers, like timeouts,
+                            # would only be repeated when retrying the writes one by one
+                            for _, _, future in run:
+                                _set_future_exception(future, err)
+                            continue
+
+                        # retry the writes one by one, so that each caller gets its own result
+                        for name, value, future in run:
+                            if future.done():
+                                continue
+                            try:
+                                _set_future_result(future, await self.__set_multiple([name], [value]))
+                            except Exception as single_err:  # pylint: disable=broad-except
+                                _set_future_exception(future, single_err)
+                    else:
+                        for _, _, future in run:
+                            _set_future_result(future, result)
+        except BaseException as err:
+            # don't leave the callers of set() waiting forever, the queued writes are handled by __fail_queued_writes
+            for _, _, future in batch:
+                _fail_future(future, err)
+            raise
+
+    def __fail_queued_writes(self, writer_task: asyncio.Task):
+        """Fails the writes that are still queued when the writer task was cancelled or crashed."""
+        if not writer_task.cancelled() and writer_task.exception() is None:
+            return  # the writer task only finishes normally once the queue is empty
+
+        err = asyncio.CancelledError() if writer_task.cancelled() else writer_task.exception()
+        while not self.__write_queue.empty():
+            _fail_future(self.__write_queue.get_nowait()[2], err)
+
+    async def __set_multiple(self, names: list[str], values: list[t.Any]):
+        """Sets consecutive registers, logging in again when necessary."""
 
         if self.__username and not self.__heartbeat_enabled:  # we must login again before trying to set the value
             logged_in = await self.login(self.__username, self.__password)
 
             if not logged_in:
-                _LOGGER.warning("Could not login, setting, %s will probably fail.", name)
+                _LOGGER.warning("Could not login, setting, %s will probably fail.", ", ".join(names))
 
         try:
-            return await self.client.set(name, value, slave=self.slave_id)
+            return await self.client.set_multiple(names, values, slave=self.slave_id)
         except PermissionDenied as err:
             if self.__username:
-                logged_in = await self.login(self.__username, self.__password)
+                logged_in = await self.__login(self.__username, self.__password)
 
                 if not logged_in:
-                    _LOGGER.error("Could not login to set %s .", name)
+                    _LOGGER.error("Could not login to set %s .", ", ".join(names))
                     raise err
 
-                return await self.client.set(name, value, slave=self.slave_id)
+                return await self.client.set_multiple(names, values, slave=self.slave_id)
 
             # we have no login-credentials available, pass on permission error
             raise err
@@ -384,8 +547,68 @@ class HuaweiSolarBridge:
         return self.battery_2_type
 
 
+def _build_plan(pv_string_count: int, has_optimizers: bool, has_battery: bool) -> RegisterPlan:
+    """Build the runs of registers that should be read on each update-call for the given capabilities"""
+    names = INVERTER_REGISTERS + STATE_AND_ALARM_REGISTERS + _PV_REGISTERS_UP_TO[pv_string_count]
+
+    if has_optimizers:
+        names += OPTIMIZER_REGISTERS
+
+    if has_battery:
+        names += ENERGY_STORAGE_REGISTERS
+
+    runs = tuple(tuple(run) for run in split_into_runs(names))
+    return RegisterPlan(tuple(chain.from_iterable(runs)), runs)
+
+
+def _set_future_result(future: asyncio.Future, result: t.Any):
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_future_exception(future: asyncio.Future, err: BaseException):
+    if not future.done():
+        future.set_exception(err)
+
+
+def _is_register_write_error(err: Exception) -> bool:
+    """Whether the error is caused by the value or address of one of the written registers."""
+    if isinstance(err, (ValueError, EncodeError)):
+        return True
+    if isinstance(err, WriteException):
+        # a WriteException without exception code is raised while encoding the value
+        return err.modbus_exception_code in (None, ModbusExceptions.IllegalAddress, ModbusExceptions.IllegalValue)
+    return False
+
+
+def _fail_future(future: asyncio.Future, err: BaseException):
+    if isinstance(err, asyncio.CancelledError):
+        future.cancel()
+    else:
+        _set_future_exception(future, err)
+
+
+def _split_into_write_runs(
+    writes: list[tuple[str, t.Any, asyncio.Future]]
+) -> list[list[tuple[str, t.Any, asyncio.Future]]]:
+    """Groups queued writes into runs of registers that directly follow each other."""
+    runs: list[list[tuple[str, t.Any, asyncio.Future]]] = []
+    run_end = 0
+
+    for write in sorted(writes, key=lambda write: REGISTERS[write[0]].register):
+        reg = REGISTERS[write[0]]
+
+        if runs and reg.register == run_end:
+            runs[-1].append(write)
+        else:
+            runs.append([write])
+        run_end = reg.register + reg.length
+
+    return runs
+
+
 # Registers which should always be read
-INVERTER_REGISTERS = [
+INVERTER_REGISTERS = (
     rn.INPUT_POWER,
     rn.LINE_VOLTAGE_A_B,
     rn.LINE_VOLTAGE_B_C,
@@ -410,23 +633,31 @@ INVERTER_REGISTERS = [
     rn.SHUTDOWN_TIME,
     rn.ACCUMULATED_YIELD_ENERGY,
     rn.DAILY_YIELD_ENERGY,
-]
+)
 
 # State and alarm registers can be combined with PV String readout
-STATE_AND_ALARM_REGISTERS = [
+STATE_AND_ALARM_REGISTERS = (
     rn.STATE_1,
     rn.STATE_2,
     rn.STATE_3,
     rn.ALARM_1,
     rn.ALARM_2,
     rn.ALARM_3,
-]
+)
+
+# Voltage and current registers of each PV string
+_PV_REGISTER_PAIRS = tuple(
+    (getattr(rn, f"PV_{idx:02}_VOLTAGE"), getattr(rn, f"PV_{idx:02}_CURRENT")) for idx in range(1, 25)
+)
+
+# PV registers to read for a given number of PV strings
+_PV_REGISTERS_UP_TO = tuple(tuple(chain.from_iterable(_PV_REGISTER_PAIRS[:count])) for count in range(25))
 
 # Registers that should be read if optimizers are present
-OPTIMIZER_REGISTERS = [rn.NB_ONLINE_OPTIMIZERS]
+OPTIMIZER_REGISTERS = (rn.NB_ONLINE_OPTIMIZERS,)
 
 # Registers that should be read if a power meter is present
-POWER_METER_REGISTERS = [
+POWER_METER_REGISTERS = (
     rn.METER_STATUS,
     rn.GRID_A_VOLTAGE,
     rn.GRID_B_VOLTAGE,
@@ -448,10 +679,10 @@ POWER_METER_REGISTERS = [
     rn.ACTIVE_GRID_A_POWER,
     rn.ACTIVE_GRID_B_POWER,
     rn.ACTIVE_GRID_C_POWER,
-]
+)
 
 # Registers that should be read if a battery is present
-ENERGY_STORAGE_REGISTERS = [
+ENERGY_STORAGE_REGISTERS = (
     rn.STORAGE_STATE_OF_CAPACITY,
     rn.STORAGE_RUNNING_STATUS,
     rn.STORAGE_BUS_VOLTAGE,
@@ -461,10 +692,10 @@ ENERGY_STORAGE_REGISTERS = [
     rn.STORAGE_TOTAL_DISCHARGE,
     rn.STORAGE_CURRENT_DAY_CHARGE_CAPACITY,
     rn.STORAGE_CURRENT_DAY_DISCHARGE_CAPACITY,
-]
+)
 
 # Covers registers 47075 - 47088 (maximum would be 47139)
-ENERGY_STORAGE_CONFIGURATION_PARAMETERS_1 = [
+ENERGY_STORAGE_CONFIGURATION_PARAMETERS_1 = (
     rn.STORAGE_MAXIMUM_CHARGING_POWER,
     rn.STORAGE_MAXIMUM_DISCHARGING_POWER,
     rn.STORAGE_CHARGING_CUTOFF_CAPACITY,
@@ -472,27 +703,29 @@ ENERGY_STORAGE_CONFIGURATION_PARAMETERS_1 = [
     rn.STORAGE_WORKING_MODE_SETTINGS,
     rn.STORAGE_CHARGE_FROM_GRID_FUNCTION,
     rn.STORAGE_GRID_CHARGE_CUTOFF_STATE_OF_CHARGE,
-]
+)
 
 # Covers registers 47200 - 47244 (maximum would be 47264)
-ENERGY_STORAGE_CONFIGURATION_PARAMETERS_2 = [
+ENERGY_STORAGE_CONFIGURATION_PARAMETERS_2 = (
     rn.STORAGE_FIXED_CHARGING_AND_DISCHARGING_PERIODS,
     rn.STORAGE_POWER_OF_CHARGE_FROM_GRID,
     rn.STORAGE_MAXIMUM_POWER_OF_CHARGE_FROM_GRID,
-]
+)
 
 # Covers register 47255 - 47299 (maximum would be 47319)
-ENERGY_STORAGE_CONFIGURATION_PARAMETERS_3 = [
+ENERGY_STORAGE_CONFIGURATION_PARAMETERS_3 = (
     rn.STORAGE_TIME_OF_USE_CHARGING_AND_DISCHARGING_PERIODS,
     rn.STORAGE_EXCESS_PV_ENERGY_USE_IN_TOU,
-]
+)
 
-CAPACITY_CONTROL_REGISTERS = [
+CAPACITY_CONTROL_REGISTERS = (
     rn.STORAGE_CAPACITY_CONTROL_MODE,
     rn.STORAGE_CAPACITY_CONTROL_SOC_PEAK_SHAVING,
     rn.STORAGE_CAPACITY_CONTROL_PERIODS,
-]
+)
+
+BACKUP_POWER_REGISTERS = (rn.STORAGE_BACKUP_POWER_STATE_OF_CHARGE,)
 
-BACKUP_POWER_REGISTERS = [
-    rn.STORAGE_BACKUP_POWER_STATE_OF_CHARGE,
-]
+# Runs of registers to read on each update-call, built on first use for each combination of
+# (number of PV strings, optimizers present, battery present)
+_PRECOMPUTED_PLANS: dict[tuple[int, bool, bool], RegisterPlan] = {}
@@ -1,13 +1,17 @@
 """
 Get production and status information from the Huawei Inverter using Modbus over TCP
 """
+from array import array
 import asyncio
 from collections import namedtuple
 from contextlib import asynccontextmanager
+from functools import lru_cache, partial
 from hashlib import sha256
 import hmac
+from itertools import chain
 import logging
-import secrets
+from operator import itemgetter
+import os
 import sys
 import typing as t
 
@@ -16,7 +20,7 @@ from pymodbus.constants import Endian
 from pymodbus.exceptions import ConnectionException as ModbusConnectionException
 from pymodbus.payload import BinaryPayloadBuilder, BinaryPayloadDecoder
 from pymodbus.pdu import ExceptionResponse, ModbusExceptions, ModbusRequest
-from pymodbus.utilities import checkCRC, computeCRC
+from pymodbus.utilities import computeCRC
 
 import huawei_solar.register_names as rn
 
@@ -24,6 +28,7 @@ from . import register_values as rv
 from .exceptions import (
     ConnectionException,
     ConnectionInterruptedException,
+    DecodeError,
     HuaweiSolarException,
     PermissionDenied,
     ReadException,
@@ -44,10 +49,18 @@ from .modbus import (
 )
 from .registers import REGISTERS, RegisterDefinition
 
+try:
+    from fastcrc import crc16 as fastcrc16
+except ImportError:  # pragma: no cover
+    fastcrc16 = None
+
 LOGGER = logging.getLogger(__name__)
 
 Result = namedtuple("Result", "value unit")
 
+# A validated read of multiple registers: the registers to read, and the byte offset of each one in the response
+PlannedRead = namedtuple("PlannedRead", "start length steps")
+
 
 DEFAULT_TCP_PORT = 502
 DEFAULT_BAUDRATE = 9600
@@ -65,11 +78,44 @@ FILE_UPLOAD_RETRY_TIMEOUT = 10
 
 PERMISSION_DENIED_EXCEPTION_CODE = 0x80
 
+# The inverter uses big-endian byte and word order for all registers
+_new_payload_builder = partial(BinaryPayloadBuilder, byteorder=Endian.BIG, wordorder=Endian.BIG)
+
+# Decoders that can be reused for the next read, instead of constructing a new one for every response
+_DECODER_POOL: list[BinaryPayloadDecoder] = []
+
+# Registers that are at most this many registers apart are read in the same request,
+# reading a few unused registers is cheaper than an extra round-trip
+RUN_GAP_THRESHOLD = 16
+# Modbus allows to read up to 125 registers in one request, stay a bit below that
+MAX_RUN_LENGTH = 120
+# Largest gap between two registers that are read in the same request
+MAX_REGISTER_GAP = 64
+
+
+def _crc16_modbus(data: bytes) -> int:
+    """Computes the CRC-16/MODBUS of the data, using the native fastcrc implementation when it is installed."""
+    if fastcrc16 is not None:
+        return fastcrc16.modbus(data)
+
+    # computeCRC returns the CRC with its upper and lower byte swapped
+    return int.from_bytes(computeCRC(data).to_bytes(2, "little"), "big")
+
 
 def _compute_digest(password, seed):
-    hashed_password = sha256(password).digest()
+    return _compute_digest_many(password, [seed])[0]
+
 
-    return hmac.digest(key=hashed_password, msg=seed, digest=sha256)
+def _compute_digest_many(password, seeds):
+    """Computes the digest of the password for each seed, hashing the password and preparing the HMAC key only once."""
+    mac = hmac.new(sha256(password).digest(), digestmod=sha256)
+
+    digests = []
+    for seed in seeds:
+        seed_mac = mac.copy()
+        seed_mac.update(seed)
+        digests.append(seed_mac.digest())
+    return digests
 
 
 class AsyncHuaweiSolar:
@@ -97,6 +143,9 @@ class AsyncHuaweiSolar:
         self.__cooled_down = asyncio.Event()
         self.__cooled_down.set()
 
+        # heartbeats sent with `heartbeat_nowait` that have not been acknowledged yet
+        self._pending_heartbeats: set[asyncio.Task] = set()
+
         # These values are set by the `initialize()` method
         self.time_zone = None
         self.battery_type = None
@@ -203,9 +252,7 @@ class AsyncHuaweiSolar:
             client = AsyncHuaweiSolarModbusSerialClient(port, baudrate, timeout, **serial_kwargs)
             await client.connect()
 
-            # wait a little bit to prevent a timeout on the first request
-            await asyncio.sleep(1)
-
+            # no need to wait here: the first request waits until the connection has settled (see WAIT_ON_CONNECT)
             huawei_solar = cls(client, slave, timeout, cooldown_time)
             await huawei_solar._initialize()
 
@@ -221,6 +268,9 @@ class AsyncHuaweiSolar:
         if self._reconnect_task:
             self._reconnect_task.cancel()
 
+        for task in self._pending_heartbeats:
+            task.cancel()
+
         self._client.close()
 
     async def _reconnect(self):
@@ -228,7 +278,7 @@ class AsyncHuaweiSolar:
         self._client.close()
         await self._client.connect()
 
-    async def _decode_response(self, reg: RegisterDefinition, decoder: BinaryPayloadDecoder):
+    def _decode_response(self, reg: RegisterDefinition, decoder: BinaryPayloadDecoder):
         """Decodes a modbus register and puts it into a Result object."""
         result = reg.decode(decoder, self)
 
@@ -240,49 +290,82 @@ class AsyncHuaweiSolar:
         """get named register from device"""
         return (await self.get_multiple([name], slave))[0]
 
-    async def get_multiple(self, names: list[str], slave=None):
+    async def get_multiple(self, names: t.Sequence[str], slave=None):
         """Read multiple registers at the same time.
 
         This is only possible if the registers are consecutively available in the
         inverters' memory.
         """
 
-        if len(names) == 0:
-            raise ValueError("Expected at least one register name")
-
-        registers = list(map(REGISTERS.get, names))
-
-        if None in registers:
-            raise ValueError("Did not recognize all register names")
-
-        for register, register_name in zip(registers, names):
-            if not register.readable:
-                raise ValueError(f"Trying to read unreadable register {register_name}")
+        plan = _plan_read(tuple(names))
 
-        for idx in range(1, len(names)):
-            if registers[idx - 1].register + registers[idx - 1].length > registers[idx].register:
-                raise ValueError(
-                    f"Requested registers must be in monotonically increasing order, "
-                    f"but {registers[idx-1].register} + {registers[idx-1].length} > {registers[idx].register}!"
-                )
+        response = await self._read_registers(plan.start, plan.length, slave)
 
-            register_distance = registers[idx - 1].register + registers[idx - 1].length - registers[idx].register
+        decoder = _acquire_decoder(response.registers)
+        try:
+            result = []
+            for offset, reg in plan.steps:
+                decoder._pointer = offset  # pylint: disable=protected-access
+                result.append(self._decode_response(reg, decoder))
+
+            return result
+        finally:
+            _DECODER_POOL.append(decoder)
+
+    async def get_multiple_best_effort(self, names: t.Sequence[str], slave=None) -> list[t.Optional[Result]]:
+        """Read multiple registers at the same time, returning None for the registers that could not be read.
+
+        The registers are first read in one request, as in `get_multiple`. If that fails because one of the
+        registers doesn't exist or can't be decoded, they are read one by one, so that one unreadable register
+        doesn't fail the rest. Other read errors, like timeouts, would only be repeated for every register,
+        so then None is returned for all of them.
+        """
+        try:
+            return await self.get_multiple(names, slave)
+        except (ReadException, DecodeError) as err:
+            LOGGER.debug("Could not read registers %s", ", ".join(names), exc_info=err)
+            if len(names) == 1 or not _is_register_error(err):
+                return [None] * len(names)
+
+        result: list[t.Optional[Result]] = []
+        for idx, name in enumerate(names):
+            try:
+                result.append(await self.get(name, slave))
+            except (ReadException, DecodeError) as err:
+                LOGGER.debug("Could not read register %s", name, exc_info=err)
+                if not _is_register_error(err):
+                    return result + [None] * (len(names) - idx)
+                result.append(None)
+        return result
 
-            if register_distance > 64:
-                raise ValueError("Gap between requested registers is too large. Split it in two requests")
+    async def get_batched(
+        self, names: t.Sequence[str], slave=None, gap_threshold: int = RUN_GAP_THRESHOLD
+    ) -> list[Result]:
+        """Read registers in any order, using as few requests as possible.
 
-        total_length = registers[-1].register + registers[-1].length - registers[0].register
+        The registers are grouped into runs of nearly consecutive registers, which are each read in one request.
+        The results are returned in the order of `names`.
+        """
+        if len(names) == 0:
+            raise ValueError("Expected at least one register name")
 
-        response = await self._read_registers(registers[0].register, total_length, slave)
+        for name in names:
+            if name not in REGISTERS:
+                raise ValueError(f"Did not recognize register name {name}")
 
-        decoder = BinaryPayloadDecoder.fromRegisters(response.registers, byteorder=Endian.BIG, wordorder=Endian.BIG)
+        runs = split_into_runs(dict.fromkeys(names), gap_threshold)
+        results = dict(zip(chain.from_iterable(runs), await self.read_runs(runs, slave)))
+        return [results[name] for name in names]
 
-        result = [await self._decode_response(registers[0], decoder)]
-        for idx in range(1, len(registers)):
-            skip_registers = registers[idx].register - (registers[idx - 1].register + registers[idx - 1].length)
-            decoder.skip_bytes(skip_registers * 2)  # registers are 16-bit, so we need to multiply by two
-            result.append(await self._decode_response(registers[idx], decoder))
+    async def read_runs(self, runs: t.Sequence[t.Sequence[str]], slave=None) -> list[Result]:
+        """Read multiple runs of registers, using one request per run.
 
+        Each run must fulfill the same requirements as the names passed to `get_multiple`.
+        The results of all runs are returned in one flat list.
+        """
+        result = []
+        for names in runs:
+            result.extend(await self.get_multiple(names, slave))
         return result
 
     async def _read_registers(self, register: int, length: int, slave: t.Optional[int]):
@@ -448,7 +531,7 @@ class AsyncHuaweiSolar:
 
             # Request the data in 'frames'
 
-            file_data = b""
+            frames: list[bytes] = []
             next_frame_no = 0
 
             while (next_frame_no * data_frame_length) < file_length:
@@ -457,9 +540,11 @@ class AsyncHuaweiSolar:
                     UploadModbusResponse,
                 )
 
-                file_data += data_upload_response.frame_data
+                frames.append(data_upload_response.frame_data)
                 next_frame_no += 1
 
+            file_data = b"".join(frames)
+
             # Complete the upload and check the CRC
             complete_upload_response = await _perform_request(
                 CompleteUploadModbusRequest(file_type, slave=slave or self.slave),
@@ -467,13 +552,11 @@ class AsyncHuaweiSolar:
             )
 
             file_crc = complete_upload_response.file_crc
-            # swap upper and lower two bytes to match how computeCRC works
-            swapped_crc = ((file_crc << 8) & 0xFF00) | ((file_crc >> 8) & 0x00FF)
+            computed_crc = _crc16_modbus(file_data)
 
-            if not checkCRC(file_data, swapped_crc):
+            if computed_crc != file_crc:
                 raise ReadException(
-                    f"Computed CRC {computeCRC(file_data):x} for file {file_type} "
-                    f"does not match expected value {swapped_crc}"
+                    f"Computed CRC {computed_crc:x} for file {file_type} does not match expected value {file_crc:x}"
                 )
 
             return file_data
@@ -484,20 +567,42 @@ class AsyncHuaweiSolar:
 
     async def set(self, name, value, slave=None):
         """set named register from device"""
+        return await self.set_multiple([name], [value], slave)
+
+    async def set_multiple(self, names: t.Sequence[str], values: t.Sequence[t.Any], slave=None):
+        """Set multiple registers at the same time.
+
+        This is only possible if the registers directly follow each other in the
+        inverters' memory.
+        """
+
+        if len(names) == 0:
+            raise ValueError("Expected at least one register name")
+        if len(names) != len(values):
+            raise ValueError("Expected as many values as register names")
+
         try:
-            reg = REGISTERS[name]
+            registers = [REGISTERS[name] for name in names]
         except KeyError as err:
             raise ValueError("Invalid Register Name") from err
 
-        if not reg.writeable:
-            raise WriteException("Register is not writable")
+        for idx in range(1, len(registers)):
+            if registers[idx - 1].register + registers[idx - 1].length != registers[idx].register:
+                raise ValueError("Registers to set must directly follow each other")
 
-        builder = BinaryPayloadBuilder(byteorder=Endian.BIG, wordorder=Endian.BIG)
-        reg.encode(value, builder)
-        value = builder.to_registers()
+        value = []
+        builder = _new_payload_builder()
+        for reg, reg_value in zip(registers, values):
+            if not reg.writeable:
+                raise WriteException("Register is not writable")
 
-        if len(value) != reg.length:
-            raise WriteException("Wrong number of registers to write")
+            builder.reset()
+            reg.encode(reg_value, builder)
+            reg_registers = builder.to_registers()
+
+            if len(reg_registers) != reg.length:
+                raise WriteException("Wrong number of registers to write")
+            value.extend(reg_registers)
 
         def backoff_giveup(details):
             raise ReadException(f"Failed to write to register after {details['tries']} tries")
@@ -516,10 +621,10 @@ class AsyncHuaweiSolar:
             on_giveup=backoff_giveup,
         )
         async def _do_set():
-            return await self._write_registers(reg.register, builder.to_registers(), slave)
+            return await self._write_registers(registers[0].register, value, slave)
 
         async with self._communication_lock():
-            LOGGER.debug("Writing to register %s value %s on slave %s", name, value, slave or self.slave)
+            LOGGER.debug("Writing to register %s value %s on slave %s", ", ".join(names), value, slave or self.slave)
             return await _do_set()
 
     async def _write_registers(self, register: int, value: list[int], slave=None) -> bool:
@@ -589,23 +694,22 @@ class AsyncHuaweiSolar:
             assert challenge_response.content[0] == 0x11
             inverter_challenge = challenge_response.content[1:17]
 
-            client_challenge = secrets.token_bytes(16)
+            client_challenge = os.urandom(16)
 
             encoded_username = username.encode("utf-8")
-            hashed_password = _compute_digest(password.encode("utf-8"), inverter_challenge)
-
-            login_bytes = bytes(
-                [
-                    len(client_challenge) + 1 + len(encoded_username) + 1 + len(hashed_password),
-                    *client_challenge,
-                    len(encoded_username),
-                    *encoded_username,
-                    len(hashed_password),
-                    *hashed_password,
-                ]
+            hashed_password, expected_inverter_mac_response = _compute_digest_many(
+                password.encode("utf-8"), [inverter_challenge, client_challenge]
             )
+
+            login_bytes = bytearray()
+            login_bytes.append(len(client_challenge) + 1 + len(encoded_username) + 1 + len(hashed_password))
+            login_bytes += client_challenge
+            login_bytes.append(len(encoded_username))
+            login_bytes += encoded_username
+            login_bytes.append(len(hashed_password))
+            login_bytes += hashed_password
             await asyncio.sleep(0.05)
-            login_request = PrivateHuaweiModbusRequest(37, login_bytes, slave=slave or self.slave)
+            login_request = PrivateHuaweiModbusRequest(37, bytes(login_bytes), slave=slave or self.slave)
             login_response = await self._client.execute(login_request)
 
             if login_response.content[1] == 0:
@@ -614,7 +718,7 @@ class AsyncHuaweiSolar:
 
                 inverter_mac_response = login_response.content[3 : 3 + inverter_mac_response_lengths]
 
-                if not _compute_digest(password.encode("utf-8"), client_challenge) == inverter_mac_response:
+                if not expected_inverter_mac_response == inverter_mac_response:
                     LOGGER.error(
                         "Inverter response contains an invalid challenge answer. This could indicate a MitM-attack!"
                     )
@@ -644,3 +748,110 @@ class AsyncHuaweiSolar:
         except HuaweiSolarException as err:
             LOGGER.exception("Exception during heartbeat: %s", err)
             return False
+
+    def heartbeat_nowait(self, slave_id) -> None:
+        """Sends the heartbeat command in the background, without waiting for the inverter to acknowledge it.
+
+        Failures are only logged. Use `heartbeat` when the result is needed.
+        """
+        task = asyncio.create_task(self.heartbeat(slave_id))
+        self._pending_heartbeats.add(task)
+        task.add_done_callback(self._pending_heartbeats.discard)
+
+
+def split_into_runs(names: t.Iterable[str], gap_threshold: int = RUN_GAP_THRESHOLD) -> list[list[str]]:
+    """Groups registers into runs of (nearly) consecutive registers which can each be read in one request.
+
+    Registers that overlap with the previous one, like aliases for the same address, start a new run.
+    """
+    if not 0 <= gap_threshold <= MAX_REGISTER_GAP:
+        raise ValueError(f"The gap threshold must be between 0 and {MAX_REGISTER_GAP}")
+
+    runs: list[list[str]] = []
+    run_start = run_end = 0
+
+    for name in sorted(names, key=lambda name: REGISTERS[name].register):
+        reg = REGISTERS[name]
+
+        if (
+            runs
+            and run_end <= reg.register <= run_end + gap_threshold
+            and reg.register + reg.length - run_start <= MAX_RUN_LENGTH
+        ):
+            runs[-1].append(name)
+        else:
+            runs.append([name])
+            run_start = reg.register
+        run_end = reg.register + reg.length
+
+    return runs
+
+
+def _is_register_error(err: HuaweiSolarException) -> bool:
+    """Whether the error is caused by the requested register itself, rather than by the connection."""
+    return isinstance(err, DecodeError) or err.modbus_exception_code == ModbusExceptions.IllegalAddress
+
+
+def _acquire_decoder(registers: list[int]) -> BinaryPayloadDecoder:
+    """Returns a big-endian decoder for the registers, reusing a pooled decoder when one is available."""
+    payload = _registers_to_bytes(registers)
+
+    try:
+        # a single pop() is atomic, so clients running in different threads can't take the same decoder
+        decoder = _DECODER_POOL.pop()
+    except IndexError:
+        return BinaryPayloadDecoder(payload, byteorder=Endian.BIG, wordorder=Endian.BIG)
+
+    decoder._payload = payload  # pylint: disable=protected-access
+    decoder._pointer = 0  # pylint: disable=protected-access
+    return decoder
+
+
+def _registers_to_bytes(registers: list[int]) -> bytes:
+    """Packs the 16-bit registers into big-endian bytes in one pass, like BinaryPayloadDecoder.fromRegisters does."""
+    packed = array("H", registers)
+    if sys.byteorder == "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+@lru_cache(maxsize=128)
+def _plan_read(names: tuple[str, ...]) -> PlannedRead:
+    """Validates that the registers can be read in one request, and precomputes how to decode them.
+
+    The plans are cached, as the same lists of registers are typically read over and over again.
+    """
+    if len(names) == 0:
+        raise ValueError("Expected at least one register name")
+
+    try:
+        # itemgetter returns a single value instead of a tuple when it gets only one name
+        registers = list(itemgetter(*names)(REGISTERS)) if len(names) > 1 else [REGISTERS[names[0]]]
+    except KeyError as err:
+        raise ValueError(f"Did not recognize register name {err.args[0]}") from err
+
+    for register, register_name in zip(registers, names):
+        if not register.readable:
+            raise ValueError(f"Trying to read unreadable register {register_name}")
+
+    steps = [(0, registers[0])]
+    previous_end = registers[0].register + registers[0].length
+
+    for register in registers[1:]:
+        register_distance = register.register - previous_end
+
+        if register_distance < 0:
+            raise ValueError(
+                f"Requested registers must be in monotonically increasing order, "
+                f"but {previous_end} > {register.register}!"
+            )
+        if register_distance > MAX_REGISTER_GAP:
+            raise ValueError("Gap between requested registers is too large. Split it in two requests")
+
+        # registers are 16-bit, so we need to multiply by two
+        steps.append(((register.register - registers[0].register) * 2, register))
+        previous_end = register.register + register.length
+
+    total_length = previous_end - registers[0].register
+
+    return PlannedRead(registers[0].register, total_length, tuple(steps))
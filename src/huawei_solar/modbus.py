@@ -13,6 +13,13 @@ WAIT_ON_CONNECT = 1500  # in milliseconds
 
 LOGGER = logging.getLogger(__name__)
 
+_START_UPLOAD_REQUEST_STRUCT = struct.Struct(">BBB")
+_START_UPLOAD_RESPONSE_STRUCT = struct.Struct(">BBLB")
+_UPLOAD_REQUEST_STRUCT = struct.Struct(">BBBH")
+_UPLOAD_RESPONSE_STRUCT = struct.Struct(">BBH")
+_COMPLETE_UPLOAD_REQUEST_STRUCT = struct.Struct(">BBB")
+_COMPLETE_UPLOAD_RESPONSE_STRUCT = struct.Struct(">BBH")
+
 
 class ModbusConnectionMixin:
     """Mixin that adds support for custom Huawei modbus messages and delays upon reconnect"""
@@ -87,7 +94,7 @@ class PrivateHuaweiModbusRequest(ModbusRequest):
         self.content = content
 
     def encode(self):
-        return bytes([self.sub_command, *self.content])
+        return bytes((self.sub_command,)) + self.content
 
     def decode(self, data):
         self.sub_command = int(data[0])
@@ -116,33 +123,36 @@ class StartUploadModbusRequest(ModbusRequest):
 
     def encode(self):
         data_length = 1 + len(self.customised_data)
-        return struct.pack(">BBB", self.sub_function_code, data_length, self.file_type) + self.customised_data
+        return (
+            _START_UPLOAD_REQUEST_STRUCT.pack(self.sub_function_code, data_length, self.file_type)
+            + self.customised_data
+        )
 
     def decode(self, data):
-        sub_function_code, data_length, self.file_type = struct.unpack(">BBB", data)
+        sub_function_code, data_length, self.file_type = _START_UPLOAD_REQUEST_STRUCT.unpack_from(data, 0)
         self.customised_data = data[3:]
 
         assert sub_function_code == self.sub_function_code
         assert len(self.customised_data) == data_length - 1
 
 
-class StartUploadModbusResponse(ModbusResponse):  # pylint: disable=too-few-public-methods
+class StartUploadModbusResponse:  # pylint: disable=too-few-public-methods
     """
-    Modbus Response to a file upload request
+    Modbus Response to a file upload request, parsed from the content of a PrivateHuaweiModbusResponse
     """
 
+    __slots__ = ("file_type", "file_length", "data_frame_length", "customised_data")
+
     function_code = 0x41
     sub_function_code = 0x05
 
     def __init__(self, data):
-        ModbusResponse.__init__(self)
-
         (
             data_length,
             self.file_type,
             self.file_length,
             self.data_frame_length,
-        ) = struct.unpack_from(">BBLB", data, 0)
+        ) = _START_UPLOAD_RESPONSE_STRUCT.unpack_from(data, 0)
         self.customised_data = data[7:]
 
         assert len(self.customised_data) == data_length - 6
@@ -163,31 +173,31 @@ class UploadModbusRequest(ModbusRequest):
 
     def encode(self):
         data_length = 3
-        return struct.pack(">BBBH", self.sub_function_code, data_length, self.file_type, self.frame_no)
+        return _UPLOAD_REQUEST_STRUCT.pack(self.sub_function_code, data_length, self.file_type, self.frame_no)
 
     def decode(self, data):
-        sub_function_code, data_length, self.file_type, self.frame_no = struct.unpack(">BBBH", data)
+        sub_function_code, data_length, self.file_type, self.frame_no = _UPLOAD_REQUEST_STRUCT.unpack(data)
 
         assert sub_function_code == self.sub_function_code
         assert data_length == 3
 
 
-class UploadModbusResponse(ModbusResponse):  # pylint: disable=too-few-public-methods
+class UploadModbusResponse:  # pylint: disable=too-few-public-methods
     """
-    Modbus Response with (a part of) a file
+    Modbus Response with (a part of) a file, parsed from the content of a PrivateHuaweiModbusResponse
     """
 
+    __slots__ = ("file_type", "frame_no", "frame_data")
+
     function_code = 0x41
     sub_function_code = 0x06
 
     def __init__(self, data):
-        ModbusResponse.__init__(self)
-
         (
             data_length,
             self.file_type,
             self.frame_no,
-        ) = struct.unpack_from(">BBH", data, 0)
+        ) = _UPLOAD_RESPONSE_STRUCT.unpack_from(data, 0)
         self.frame_data = data[4:]
 
         assert len(self.frame_data) == data_length - 3
@@ -207,29 +217,30 @@ class CompleteUploadModbusRequest(ModbusRequest):
 
     def encode(self):
         data_length = 1
-        return struct.pack(">BBB", self.sub_function_code, data_length, self.file_type)
+        return _COMPLETE_UPLOAD_REQUEST_STRUCT.pack(self.sub_function_code, data_length, self.file_type)
 
     def decode(self, data):
-        sub_function_code, data_length, self.file_type = struct.unpack(">BBB", data)
+        sub_function_code, data_length, self.file_type = _COMPLETE_UPLOAD_REQUEST_STRUCT.unpack(data)
 
         assert sub_function_code == self.sub_function_code
         assert data_length == 1
 
 
-class CompleteUploadModbusResponse(ModbusResponse):  # pylint: disable=too-few-public-methods
+class CompleteUploadModbusResponse:  # pylint: disable=too-few-public-methods
     """
-    Modbus Response when a file upload has been completed
+    Modbus Response when a file upload has been completed, parsed from the content of a PrivateHuaweiModbusResponse
     """
 
+    __slots__ = ("file_type", "file_crc")
+
     function_code = 0x41
     sub_function_code = 0x0C
 
     def __init__(self, data):
-        ModbusResponse.__init__(self)
         (
             data_length,
             self.file_type,
             self.file_crc,
-        ) = struct.unpack_from(">BBH", data, 0)
+        ) = _COMPLETE_UPLOAD_RESPONSE_STRUCT.unpack_from(data, 0)
 
         assert data_length == 3
@@ -2,9 +2,38 @@
 Generic Utilities
 """
 
+import asyncio
 from datetime import datetime, tzinfo
+import sys
+import typing as t
 
 
 def get_local_timezone() -> tzinfo:
     """Returns the current local timezone"""
     return datetime.now().astimezone().tzinfo
+
+
+async def run_concurrently(*coros: t.Coroutine[t.Any, t.Any, t.Any]) -> list[t.Any]:
+    """Runs the coroutines concurrently and returns their results in order, like asyncio.gather.
+
+    When one of them fails, the others are cancelled and the first error is raised.
+    """
+    if sys.version_info < (3, 11):
+        gathered = [asyncio.ensure_future(coro) for coro in coros]
+        try:
+            return await asyncio.gather(*gathered)
+        except BaseException:
+            # asyncio.gather leaves the other tasks running, cancel them like a TaskGroup does
+            for task in gathered:
+                task.cancel()
+            await asyncio.gather(*gathered, return_exceptions=True)
+            raise
+
+    try:
+        async with asyncio.TaskGroup() as task_group:
+            tasks = [task_group.create_task(coro) for coro in coros]
+    except BaseExceptionGroup as exc_group:  # pylint: disable=undefined-variable
+        # the other tasks are cancelled, raise the first error like asyncio.gather does
+        raise exc_group.exceptions[0] from None
+
+    return [task.result() for task in tasks]
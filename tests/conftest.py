@@ -1,6 +1,7 @@
 import asyncio
 
 from pymodbus.register_read_message import ReadHoldingRegistersResponse
+from pymodbus.register_write_message import WriteMultipleRegistersResponse, WriteSingleRegisterResponse
 import pytest
 
 from huawei_solar.huawei_solar import AsyncHuaweiSolar
@@ -111,10 +112,19 @@ class MockModbusClient:
         self.connected = True
         self.connected_event = asyncio.Event()
         self.connected_event.set()
+        self.written_registers = []
 
     async def read_holding_registers(self, register, length, *args, **kwargs):
         return ReadHoldingRegistersResponse(MOCK_REGISTERS[(register, length)])
 
+    async def write_register(self, register, value, *args, **kwargs):
+        self.written_registers.append((register, [value]))
+        return WriteSingleRegisterResponse(register, value)
+
+    async def write_registers(self, register, values, *args, **kwargs):
+        self.written_registers.append((register, values))
+        return WriteMultipleRegistersResponse(register, len(values))
+
 
 @pytest.fixture
 def huawei_solar():
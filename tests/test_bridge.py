@@ -0,0 +1,211 @@
+import asyncio
+import logging
+from unittest.mock import AsyncMock
+
+from pymodbus.pdu import ExceptionResponse, ModbusExceptions
+from pymodbus.register_read_message import ReadHoldingRegistersResponse
+import pytest
+
+from huawei_solar import AsyncHuaweiSolar, HuaweiSolarBridge
+from huawei_solar.exceptions import ReadException
+import huawei_solar.register_names as rn
+import huawei_solar.register_values as rv
+from huawei_solar.registers import REGISTERS
+
+
+class RegisterMapModbusClient:
+    """Returns the values of a register map for any read, registers that are not in the map read as 0."""
+
+    def __init__(self, values: dict[int, int], illegal_registers: set[int]) -> None:
+        self.connected = True
+        self.connected_event = asyncio.Event()
+        self.connected_event.set()
+        self.values = values
+        self.illegal_registers = illegal_registers
+        self.reads: list[tuple[int, int]] = []
+
+    async def read_holding_registers(self, register, length, *args, **kwargs):
+        self.reads.append((register, length))
+        if any(reg in self.illegal_registers for reg in range(register, register + length)):
+            return ExceptionResponse(3, ModbusExceptions.IllegalAddress)
+        return ReadHoldingRegistersResponse([self.values.get(reg, 0) for reg in range(register, register + length)])
+
+
+INVERTER_VALUES = {
+    30071: 2,  # NB_PV_STRINGS
+    32089: 0x0200,  # DEVICE_STATUS: On-grid
+    37100: rv.MeterStatus.NORMAL,
+    37125: rv.MeterType.THREE_PHASE,
+    47000: rv.StorageProductModel.HUAWEI_LUNA2000,
+}
+
+
+async def _populated_bridge(values, illegal_registers=frozenset()) -> HuaweiSolarBridge:
+    client = AsyncHuaweiSolar(
+        RegisterMapModbusClient({**INVERTER_VALUES, **values}, set(illegal_registers)), cooldown_time=0
+    )
+    client.time_zone = 60
+
+    bridge = HuaweiSolarBridge(client, asyncio.Lock(), primary=False)
+    await HuaweiSolarBridge._HuaweiSolarBridge__populate_fields(bridge)
+    return bridge
+
+
+@pytest.fixture
+def bridge(huawei_solar):
+    return HuaweiSolarBridge(huawei_solar, asyncio.Lock(), primary=False)
+
+
+@pytest.mark.asyncio
+async def test_populate_fields_with_unreadable_registers(caplog):
+    with caplog.at_level(logging.WARNING):
+        bridge = await _populated_bridge(
+            {37125: 99},  # not a valid METER_TYPE
+            illegal_registers={37200, 47954},  # NB_OPTIMIZERS, STORAGE_CAPACITY_CONTROL_MODE
+        )
+
+    assert bridge.pv_string_count == 2
+    assert bridge.has_optimizers is False
+    assert bridge.battery_1_type == rv.StorageProductModel.HUAWEI_LUNA2000
+    assert bridge.battery_2_type == rv.StorageProductModel.NONE
+    assert bridge.supports_capacity_control is False
+    assert bridge.power_meter_online is True
+    assert bridge.power_meter_type is None
+    assert "Could not determine the type of the power meter" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_stop_during_heartbeat(huawei_solar, bridge):
+    heartbeats = 0
+
+    async def slow_heartbeat(slave_id):
+        nonlocal heartbeats
+        heartbeats += 1
+        await asyncio.sleep(0.05)
+        return True
+
+    huawei_solar.heartbeat = slow_heartbeat
+
+    bridge.start_heartbeat()
+    await asyncio.sleep(0.01)  # the first heartbeat is now in flight
+
+    await asyncio.wait_for(bridge.stop(), 1)
+    assert heartbeats == 1
+
+
+@pytest.mark.asyncio
+async def test_stop_with_queued_write_after_login(huawei_solar, bridge):
+    huawei_solar.login = AsyncMock(return_value=True)
+    huawei_solar.heartbeat = AsyncMock(return_value=True)
+
+    await bridge.login("installer", "password")
+    pending_set = asyncio.create_task(bridge.set(rn.STORAGE_MAXIMUM_CHARGING_POWER, 2500))
+    await asyncio.sleep(0)  # the write is now queued
+
+    await asyncio.wait_for(bridge.stop(), 1)
+
+    assert pending_set.result() is True
+    assert huawei_solar.login.call_count == 1
+    assert bridge._HuaweiSolarBridge__heartbeat_task.done()
+
+
+@pytest.mark.asyncio
+async def test_set_combines_consecutive_writes(huawei_solar, bridge):
+    assert await asyncio.gather(
+        bridge.set(rn.STORAGE_MAXIMUM_CHARGING_POWER, 2500),
+        bridge.set(rn.STORAGE_MAXIMUM_DISCHARGING_POWER, 3000),
+    ) == [True, True]
+
+    assert huawei_solar._client.written_registers == [(47075, [0, 2500, 0, 3000])]
+
+
+@pytest.mark.asyncio
+async def test_set_retries_failed_combined_write_one_by_one(huawei_solar, bridge):
+    results = await asyncio.gather(
+        bridge.set(rn.STORAGE_MAXIMUM_CHARGING_POWER, 2500),
+        bridge.set(rn.STORAGE_MAXIMUM_DISCHARGING_POWER, "invalid"),
+        return_exceptions=True,
+    )
+
+    assert results[0] is True
+    assert isinstance(results[1], ValueError)
+    assert huawei_solar._client.written_registers == [(47075, [0, 2500])]
+
+
+@pytest.mark.asyncio
+async def test_set_does_not_retry_timed_out_combined_write(huawei_solar, bridge):
+    huawei_solar.set_multiple = AsyncMock(side_effect=ReadException("Failed to write to register after 3 tries"))
+
+    results = await asyncio.gather(
+        bridge.set(rn.STORAGE_MAXIMUM_CHARGING_POWER, 2500),
+        bridge.set(rn.STORAGE_MAXIMUM_DISCHARGING_POWER, 3000),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, ReadException) for result in results)
+    assert huawei_solar.set_multiple.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_set_cancelled_caller(huawei_solar, bridge):
+    cancelled_set = asyncio.create_task(bridge.set(rn.STORAGE_MAXIMUM_CHARGING_POWER, 2500))
+    other_set = asyncio.create_task(bridge.set(rn.STORAGE_MAXIMUM_DISCHARGING_POWER, 3000))
+    await asyncio.sleep(0)  # both writes are now queued
+
+    cancelled_set.cancel()
+
+    assert await asyncio.wait_for(other_set, 1) is True
+    assert huawei_solar._client.written_registers == [(47077, [0, 3000])]
+
+
+@pytest.mark.asyncio
+async def test_set_cancelled_writer(huawei_solar, bridge):
+    pending_set = asyncio.create_task(bridge.set(rn.STORAGE_MAXIMUM_CHARGING_POWER, 2500))
+    await asyncio.sleep(0)  # the write is now queued
+
+    bridge._HuaweiSolarBridge__writer_task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(pending_set, 1)
+
+
+@pytest.mark.asyncio
+async def test_update_reads_one_request_per_run():
+    bridge = await _populated_bridge({37125: 99})  # no power meter registers are read without a known meter type
+    modbus_client = bridge.client._client
+    modbus_client.reads.clear()
+
+    result = await bridge.update()
+
+    plan = bridge._get_update_register_plan()
+    expected_reads = []
+    for run in plan.runs:
+        first, last = REGISTERS[run[0]], REGISTERS[run[-1]]
+        expected_reads.append((first.register, last.register + last.length - first.register))
+
+    assert modbus_client.reads == expected_reads
+    assert len(plan.runs) < len(plan.names)
+    assert set(result) == set(plan.names)
+
+
+@pytest.mark.asyncio
+async def test_update_into_rechecks_power_meter_after_device_status_change():
+    bridge = await _populated_bridge({})
+    modbus_client = bridge.client._client
+    modbus_client.reads.clear()
+
+    result: dict = {}
+    await bridge.update_into(result)
+    assert (37100, 1) not in modbus_client.reads  # the power meter is known to be online
+
+    modbus_client.values[32089] = 0x0000  # DEVICE_STATUS: Standby
+    modbus_client.values[37100] = rv.MeterStatus.OFFLINE
+    modbus_client.reads.clear()
+
+    # reusing the same dict, which already contains the previous device status
+    await bridge.update_into(result)
+
+    assert (37100, 1) in modbus_client.reads
+    assert not bridge.power_meter_online
+    assert result[rn.METER_STATUS].value == rv.MeterStatus.OFFLINE
+    assert bridge.previous_update_result is result
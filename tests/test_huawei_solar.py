@@ -1,10 +1,12 @@
+import asyncio
 from datetime import datetime, timezone
 from unittest.mock import patch
 
 from pymodbus.register_read_message import ReadHoldingRegistersResponse
 import pytest
 
-from huawei_solar.exceptions import DecodeError
+from huawei_solar.exceptions import DecodeError, ReadException
+from huawei_solar.huawei_solar import _compute_digest, _compute_digest_many, _crc16_modbus, _registers_to_bytes
 import huawei_solar.register_names as rn
 import huawei_solar.register_values as rv
 from huawei_solar.register_values import GridCode
@@ -65,6 +67,83 @@ async def test_get_multiple(huawei_solar):
     assert result[1].unit is None
 
 
+@pytest.mark.asyncio
+async def test_get_multiple_best_effort(huawei_solar):
+    result = await huawei_solar.get_multiple_best_effort([rn.MODEL_NAME, rn.SERIAL_NUMBER])
+    assert result[0].value == "SUN2000-3KTL-L1"
+    assert result[1].value == "HV3021621085"
+
+
+@pytest.mark.asyncio
+async def test_get_multiple_best_effort_partial_failure(huawei_solar):
+    async def _read_registers(register, length, slave):
+        if register != 30000 or length != 15:
+            raise ReadException("IllegalAddress", modbus_exception_code=2)
+        return await huawei_solar._client.read_holding_registers(register, length)
+
+    with patch.object(huawei_solar, "_read_registers", side_effect=_read_registers):
+        result = await huawei_solar.get_multiple_best_effort([rn.MODEL_NAME, rn.SERIAL_NUMBER])
+        assert result[0].value == "SUN2000-3KTL-L1"
+        assert result[1] is None
+
+
+@pytest.mark.asyncio
+async def test_get_multiple_best_effort_failure(huawei_solar):
+    with patch.object(huawei_solar, "_read_registers", side_effect=ReadException("IllegalAddress")):
+        assert await huawei_solar.get_multiple_best_effort([rn.NB_OPTIMIZERS]) == [None]
+
+
+@pytest.mark.asyncio
+async def test_get_multiple_best_effort_timeout(huawei_solar):
+    with patch.object(huawei_solar, "_read_registers", side_effect=ReadException("Timeout")) as read_registers:
+        assert await huawei_solar.get_multiple_best_effort([rn.METER_STATUS, rn.METER_TYPE]) == [None, None]
+
+    # the registers are not retried one by one
+    assert read_registers.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_read_runs(huawei_solar):
+    result = await huawei_solar.read_runs([[rn.MODEL_NAME, rn.SERIAL_NUMBER], [rn.NB_PV_STRINGS]])
+    assert len(result) == 3
+
+    assert result[0].value == "SUN2000-3KTL-L1"
+    assert result[1].value == "HV3021621085"
+    assert result[2].value == 2
+
+
+@pytest.mark.asyncio
+async def test_get_multiple_gap_too_large(huawei_solar):
+    with pytest.raises(ValueError):
+        await huawei_solar.get_multiple([rn.MODEL_NAME, rn.INPUT_POWER])
+
+
+@pytest.mark.asyncio
+async def test_get_batched(huawei_solar):
+    with patch.object(huawei_solar, "_read_registers", wraps=huawei_solar._read_registers) as read_registers:
+        result = await huawei_solar.get_batched([rn.NB_PV_STRINGS, rn.SERIAL_NUMBER, rn.MODEL_NAME])
+
+    assert [call.args[:2] for call in read_registers.call_args_list] == [(30000, 25), (30071, 1)]
+
+    assert result[0].value == 2
+    assert result[1].value == "HV3021621085"
+    assert result[2].value == "SUN2000-3KTL-L1"
+
+
+@pytest.mark.asyncio
+async def test_get_batched_aliased_registers(huawei_solar):
+    result = await huawei_solar.get_batched([rn.SYSTEM_TIME, rn.SYSTEM_TIME_RAW])
+
+    assert isinstance(result[0].value, datetime)
+    assert result[1].value == (25069 << 16) + 53611
+
+
+@pytest.mark.asyncio
+async def test_get_batched_gap_threshold_too_large(huawei_solar):
+    with pytest.raises(ValueError):
+        await huawei_solar.get_batched([rn.MODEL_NAME], gap_threshold=100)
+
+
 @pytest.mark.asyncio
 async def test_get_model_id(huawei_solar):
     result = await huawei_solar.get("model_id")
@@ -570,3 +649,59 @@ async def test_get_time_zone(huawei_solar):
     result = await huawei_solar.get(rn.TIME_ZONE)
     assert result.value == 60
     assert result.unit == "min"
+
+
+@pytest.mark.asyncio
+async def test_set(huawei_solar):
+    assert await huawei_solar.set(rn.STORAGE_MAXIMUM_CHARGING_POWER, 2500)
+    assert huawei_solar._client.written_registers == [(47075, [0, 2500])]
+
+
+@pytest.mark.asyncio
+async def test_set_multiple(huawei_solar):
+    assert await huawei_solar.set_multiple(
+        [rn.STORAGE_MAXIMUM_CHARGING_POWER, rn.STORAGE_MAXIMUM_DISCHARGING_POWER], [2500, 3000]
+    )
+    assert huawei_solar._client.written_registers == [(47075, [0, 2500, 0, 3000])]
+
+
+@pytest.mark.asyncio
+async def test_set_multiple_not_consecutive(huawei_solar):
+    with pytest.raises(ValueError):
+        await huawei_solar.set_multiple(
+            [rn.STORAGE_MAXIMUM_CHARGING_POWER, rn.STORAGE_CHARGING_CUTOFF_CAPACITY], [2500, 90.0]
+        )
+    assert huawei_solar._client.written_registers == []
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_nowait(huawei_solar):
+    huawei_solar.heartbeat_nowait(None)
+    assert huawei_solar._client.written_registers == []
+
+    await asyncio.wait(huawei_solar._pending_heartbeats)
+    assert huawei_solar._client.written_registers == [(49999, [1])]
+    assert not huawei_solar._pending_heartbeats
+
+
+def test_registers_to_bytes():
+    assert _registers_to_bytes([0x0102, 0xFFFE, 0]) == b"\x01\x02\xff\xfe\x00\x00"
+
+
+@pytest.mark.parametrize("use_fastcrc", [True, False], ids=["fastcrc", "computeCRC"])
+def test_crc16_modbus(use_fastcrc):
+    if use_fastcrc:
+        pytest.importorskip("fastcrc")
+        assert _crc16_modbus(b"123456789") == 0x4B37
+    else:
+        with patch("huawei_solar.huawei_solar.fastcrc16", None):
+            assert _crc16_modbus(b"123456789") == 0x4B37
+
+
+def test_compute_digest_many():
+    seeds = [bytes(range(16)), bytes(range(16, 32))]
+    assert _compute_digest_many(b"password", seeds) == [_compute_digest(b"password", seed) for seed in seeds]
+    assert (
+        _compute_digest(b"password", seeds[0]).hex()
+        == "6173319eb2a26afcc54fb85fb4a1b9d446a49bb934d86afb8a7c2319a417b3cc"
+    )
@@ -0,0 +1,48 @@
+import asyncio
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from huawei_solar.utils import run_concurrently
+
+
+@pytest.fixture(params=[False, True], ids=["native", "gather-fallback"])
+def gather_fallback(request):
+    if request.param:
+        with patch.object(sys, "version_info", (3, 10)):
+            yield
+    else:
+        yield
+
+
+async def _value(value, delay=0.0):
+    await asyncio.sleep(delay)
+    return value
+
+
+async def _fail():
+    raise ValueError("failed")
+
+
+@pytest.mark.asyncio
+async def test_run_concurrently(gather_fallback):
+    assert await run_concurrently(_value(1, 0.01), _value(2)) == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_run_concurrently_failure_cancels_others(gather_fallback):
+    cancelled = False
+
+    async def _slow():
+        nonlocal cancelled
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+    with pytest.raises(ValueError):
+        await run_concurrently(_slow(), _fail())
+
+    assert cancelled